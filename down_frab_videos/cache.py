@@ -0,0 +1,118 @@
+# vi: set et ts=4 sw=4 sts=4:
+import os
+import json
+import pickle
+import time
+import hashlib
+import tempfile
+
+
+class cache:
+    """
+    Simple on-disk cache for data downloaded from the net.
+
+    Each entry is identified by a key (usually the url the data was obtained
+    from) and consists of the data itself (as bytes) and a dictionary of
+    metadata, e.g. the ETag the server sent alongside the data.
+    """
+
+    def __init__(self, directory=None, refresh=False):
+        """
+        Initialise the cache, which keeps its files in directory.
+        If directory is None, the default location is used.
+
+        If refresh is True, all existing entries are ignored, such that
+        everything is downloaded again and stored anew.
+        """
+        if directory is None:
+            directory = cache.default_directory()
+        self.__directory = directory
+        self.__refresh = refresh
+
+    @staticmethod
+    def default_directory():
+        """Return the default cache directory following the XDG conventions"""
+        base = os.environ.get("XDG_CACHE_HOME", "")
+        if not base:
+            base = os.path.expanduser("~/.cache")
+        return os.path.join(base, "down-frab-videos")
+
+    @property
+    def directory(self):
+        """Return the directory in which the cached files are kept"""
+        return self.__directory
+
+    def __path(self, key):
+        """Return the path of the cache file for key"""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.__directory, digest)
+
+    def load(self, key):
+        """
+        Return the tuple (data, metadata) stored for key or None
+        if there is no such entry in the cache. The metadata contains
+        the time at which the entry was stored ("time").
+        """
+        if self.__refresh:
+            return None
+
+        # The first line of the file holds the metadata in json format,
+        # the remainder is the data.
+        try:
+            with open(self.__path(key), "rb") as f:
+                metadata = json.loads(f.readline().decode("utf-8"))
+                data = f.read()
+        except (IOError, ValueError):
+            return None
+
+        if metadata.get("key") != key:
+            return None
+        return data, metadata
+
+    def load_pickled(self, key):
+        """
+        Return the tuple (object, metadata) for an entry stored by store_pickled
+        or None if there is no such entry. Entries which cannot be unpickled
+        (e.g. since they were written by an incompatible version) are treated
+        as if they were absent.
+        """
+        cached = self.load(key)
+        if cached is None:
+            return None
+        try:
+            return pickle.loads(cached[0]), cached[1]
+        except Exception:
+            return None
+
+    def store_pickled(self, key, obj, metadata={}):
+        """Store the pickled form of obj and the dictionary metadata for key"""
+        self.store(key, pickle.dumps(obj), metadata)
+
+    def store(self, key, data, metadata={}):
+        """
+        Store data (as bytes) and the dictionary metadata for key.
+        Errors while writing to the cache are silently ignored.
+        """
+        path = self.__path(key)
+        header = json.dumps(dict(metadata, key=key, time=time.time())) + "\n"
+        try:
+            os.makedirs(self.__directory, exist_ok=True)
+
+            # Write to a temporary file first, such that an interrupted
+            # write never leaves a truncated entry behind. Each writer gets
+            # its own file, since other runs may store the same key.
+            fd, tmppath = tempfile.mkstemp(dir=self.__directory, suffix=".tmp",
+                                           prefix=os.path.basename(path) + ".")
+        except IOError:
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header.encode("utf-8"))
+                f.write(data)
+            os.replace(tmppath, path)
+        except IOError:
+            try:
+                os.unlink(tmppath)
+            except IOError:
+                pass
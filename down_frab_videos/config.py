@@ -1,9 +1,25 @@
 # vi: set et ts=4 sw=4 sts=4:
 import os
-import re
 import sys
-import yaml
 import datetime
+import functools
+import pickle
+import textwrap
+
+
+@functools.lru_cache(maxsize=1)
+def _yaml_classes():
+    """
+    Return the tuple (Loader, Dumper) of yaml classes to use. yaml is only
+    imported here, such that e.g. --version does not need to load it.
+    """
+    import yaml
+
+    # Use the libyaml bindings if available, since they are much faster
+    try:
+        return yaml.CSafeLoader, yaml.CSafeDumper
+    except AttributeError:
+        return yaml.SafeLoader, yaml.SafeDumper
 
 
 class config:
@@ -140,22 +156,65 @@ class config:
         },
     }
 
-    def __init__(self, file=None):
+    @staticmethod
+    def __parse(file):
+        """Parse the yaml config in the file object file and return the data"""
+        import yaml
+        return yaml.load(file, Loader=_yaml_classes()[0])
+
+    @staticmethod
+    def __load_file(path, datacache=None):
+        """
+        Return the data of the config file at path in pickled form,
+        such that each caller unpickles a copy it may modify.
+        """
+        st = os.stat(path)
+        return config.__load_file_version(os.path.abspath(path), st.st_mtime_ns,
+                                          st.st_size, datacache)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def __load_file_version(path, mtime, size, datacache):
+        """
+        Implementation of __load_file. The modification time and the size of the
+        file are part of the key of the lru_cache, such that a file is
+        only parsed again once it changed.
+        """
+        key = "config:" + path
+        version = {"mtime": mtime, "size": size}
+        if datacache is not None:
+            cached = datacache.load_pickled(key)
+            if cached is not None and all(cached[1].get(k) == v
+                                          for k, v in version.items()):
+                return pickle.dumps(cached[0])
+
+        # Let the yaml parser read and decode the raw bytes itself
+        with open(path, "rb") as f:
+            parsed = config.__parse(f)
+        if datacache is not None:
+            datacache.store_pickled(key, parsed, version)
+        return pickle.dumps(parsed)
+
+    def __init__(self, file=None, datacache=None):
         """
         Parse the config from a file
 
         If file is None the defaults will be used, else the defaults will be
         updated with the parsed data
+
+        datacache   Cache object in which the parsed config file is kept, such
+                    that yaml only needs to parse it again once it changes,
+                    or None to parse it on every run. Within one run a
+                    file is only parsed once in either case.
         """
 
         self.__settings = config.__default_config["settings"]
         self.__events = config.__default_config["events"]
         if file is not None:
             if isinstance(file, str):
-                with open(file) as f:
-                    parsed = yaml.safe_load(f)
+                parsed = pickle.loads(config.__load_file(file, datacache))
             else:
-                parsed = yaml.safe_load(file)
+                parsed = config.__parse(file)
 
             try:
                 self.__settings = parsed["settings"]
@@ -167,20 +226,22 @@ class config:
             except KeyError:
                 pass
 
-        # determine most recent event:
-        mrecent = datetime.timedelta(10*365)
-        mname = ""
+        # determine most recent event, i.e. the one which started last.
+        # The dates are given as yyyy-mm-dd (yaml may already have parsed them).
+        today = datetime.date.today()
+        started = []
         for name, event in self.events.items():
             try:
-                eventdate = datetime.date(*map(int, event["starts"].split("-")))
-            except ValueError as e:
+                starts = datetime.date(*map(int, str(event["starts"]).split("-")))
+            except (TypeError, ValueError) as e:
                 raise ValueError("Date format for starts field of event \"" + name +
                                  "\" is not valid: " + str(e))
+            if starts <= today:
+                started.append((starts, name))
 
-            offset = datetime.date.today() - eventdate
-            if offset < mrecent and offset.total_seconds() >= 0:
-                mrecent = offset
-                mname = name
+        if len(started) == 0:
+            raise ValueError("None of the configured events has started yet.")
+        mname = max(started)[1]
 
         self.__most_recent_event = self.events[mname]
 
@@ -204,22 +265,27 @@ class config:
         return self.__most_recent_event
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def default_config():
         """Returns default config as a string"""
+        import yaml
+        dumper = _yaml_classes()[1]
+
+        comments = yaml.dump(config.__default_config_comments, Dumper=dumper,
+                             default_flow_style=False)
+        fields = yaml.dump(config.__default_config, Dumper=dumper,
+                           default_flow_style=False)
 
-        string = "---\n"
-        string += "#\n"
-        string += "# Config file for " + os.path.basename(sys.argv[0]) + "\n"
-        string += "#\n"
-        string += "# The keys have the following meanings:\n"
-
-        comments = yaml.safe_dump(config.__default_config_comments,
-                                  default_flow_style=False)
-        # add comment symbols in front of each new line:
-        string += re.sub("\n", "\n# ", re.sub("^", "# ", comments))
-        string += "\n########\n\n"
-
-        # add actual fields:
-        string += yaml.safe_dump(config.__default_config, default_flow_style=False)
-        string += "..."
-        return string
+        return "".join([
+            "---\n",
+            "#\n",
+            "# Config file for " + os.path.basename(sys.argv[0]) + "\n",
+            "#\n",
+            "# The keys have the following meanings:\n",
+            # add comment symbols in front of each line:
+            textwrap.indent(comments, "# "),
+            "\n########\n\n",
+            # add actual fields:
+            fields,
+            "...",
+        ])